@@ -0,0 +1,100 @@
+""" Shared functionality for sending UMM-C to UMM-S association requests to
+    CMR, used by both `manage_associations.py` and `mirror_associations.py`.
+
+    Collections are sent in chunks of at most `CHUNK_SIZE` concept IDs, with
+    up to `MAX_CONCURRENT_REQUESTS` chunks in flight at once. If any chunks
+    fail, an `AssociationRequestError` is raised once all chunks have been
+    attempted, listing the concept IDs of each failed chunk, so that only
+    those need to be retried.
+
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple
+
+import requests
+
+
+# Maximum number of collections included in a single association request:
+CHUNK_SIZE = 250
+
+# Maximum number of association requests sent to CMR at the same time:
+MAX_CONCURRENT_REQUESTS = 4
+
+
+class AssociationRequestError(Exception):
+    """ Raised when one or more chunks of an association request failed.
+
+        `failed_chunks` contains a tuple for each failed chunk, of the index
+        of the first collection in the chunk (within the full list of concept
+        IDs), the concept IDs in the chunk and the exception raised.
+
+    """
+    def __init__(self, failed_chunks: List[Tuple[int, List[str], Exception]]):
+        self.failed_chunks = failed_chunks
+        failed_ranges = ', '.join(
+            f'{chunk_start}-{chunk_start + len(chunk) - 1}'
+            for chunk_start, chunk, _ in sorted(failed_chunks, key=lambda failure: failure[0])
+        )
+        super().__init__(
+            f'{len(failed_chunks)} association chunks failed, covering '
+            f'collection indices: {failed_ranges}'
+        )
+
+    @property
+    def failed_concept_ids(self) -> List[str]:
+        """ All concept IDs from failed chunks, e.g. to retry them. """
+        return [
+            concept_id
+            for _, chunk, _ in sorted(self.failed_chunks, key=lambda failure: failure[0])
+            for concept_id in chunk
+        ]
+
+
+def send_association_requests(
+    authenticated_session: requests.Session,
+    http_method: str,
+    association_url: str,
+    collection_concept_ids: List[str]
+):
+    """ Send chunks of at most `CHUNK_SIZE` collections to a CMR association
+        endpoint, with up to `MAX_CONCURRENT_REQUESTS` chunks in flight at
+        once. All chunks are attempted, and then an `AssociationRequestError`
+        is raised if any of them failed.
+
+    """
+    total_collections = len(collection_concept_ids)
+
+    def send_chunk(chunk: List[str]) -> int:
+        json_payload = [{'concept_id': collection_concept_id}
+                        for collection_concept_id in chunk]
+
+        response = authenticated_session.request(
+            http_method, association_url, json=json_payload
+        )
+        response.raise_for_status()
+        return len(chunk)
+
+    completed_collections = 0
+    failed_chunks = []
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        chunk_futures = {}
+
+        for chunk_start in range(0, total_collections, CHUNK_SIZE):
+            chunk = collection_concept_ids[chunk_start:chunk_start + CHUNK_SIZE]
+            chunk_futures[executor.submit(send_chunk, chunk)] = (chunk_start, chunk)
+
+        for future in as_completed(chunk_futures):
+            chunk_start, chunk = chunk_futures[future]
+
+            try:
+                completed_collections += future.result()
+                print(f'{http_method} associations: '
+                      f'{completed_collections}/{total_collections}')
+            except requests.RequestException as exception:
+                print(f'{http_method} associations failed for collections '
+                      f'{chunk_start}-{chunk_start + len(chunk) - 1}: {exception}')
+                failed_chunks.append((chunk_start, chunk, exception))
+
+    if failed_chunks:
+        raise AssociationRequestError(failed_chunks) from failed_chunks[0][2]
@@ -18,7 +18,12 @@
     Requirements:
 
     * A local `.netrc` file.
-    * The `requests` package in your local Python environment.
+    * The `requests`, `ijson` and `orjson` packages in your local Python
+      environment.
+    * `opendap_collections.py` in the same directory as this module.
+
+    The EDL token is cached in `~/.edc-umm-token-<environment>.json`, and reused
+    by later runs until shortly before it expires.
 
     To scan _all_ collections, you can comment out the line in the query that
     sets `cloudHosted` to `True`. However, that means scanning 52000 collections
@@ -34,10 +39,21 @@
     Owen Littlejohns, 2024-03-15
 
 """
-import json
-
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from typing import Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import ijson
+import orjson
 import requests
 
+from opendap_collections import get_collection_rows
+
 
 environment_parameters = {
     'prod': {
@@ -57,34 +73,184 @@ environment_parameters = {
     }
 }
 
+# The only RelatedUrl fields used to identify OPeNDAP collections. CMR graph
+# returns `relatedUrls` as an opaque JSON value, so the other fields can only
+# be dropped after each page has been received.
+RELATED_URL_KEYS = ('type', 'subtype', 'url')
+
+# Number of collections requested per CMR graph page. This is reduced while
+# CMR graph is timing out, and restored once pages succeed again:
+CMR_GRAPH_PAGE_LIMIT = 500
+
+# HTTP statuses retried automatically for CMR graph requests. A 504 is not
+# retried at the same page size, as `query_cmr_graph_for_collections` instead
+# halves the page limit and requests the page again:
+CMR_GRAPH_RETRY_STATUSES = (429, 500, 502, 503)
+
+# (RelatedUrl.type, RelatedUrl.subtype) pairs that indicate an OPeNDAP URL:
+OPENDAP_RELATED_URL_TYPES = frozenset({('USE SERVICE API', 'OPENDAP DATA')})
+
+
+def get_pooled_session(
+    retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+    retry_methods: Iterable[str] = ('GET',)
+) -> requests.Session:
+    """ Create a `requests.Session` object that reuses keep-alive
+        connections between requests, and retries transient server errors.
+
+        Responses with a status in `retry_statuses` are retried up to five
+        times with exponential backoff (1, 2, 4, 8 seconds...). A `Retry-After`
+        header, e.g. on a 429 response, takes precedence over the backoff. If
+        all retries fail, the last response is returned.
+
+        Only requests using `retry_methods` are retried. By default this
+        excludes POST, as not all POST requests are safe to repeat (e.g.
+        creating an EDL token).
+
+    """
+    retries = Retry(
+        total=5,
+        backoff_factor=1.0,
+        status_forcelist=list(retry_statuses),
+        allowed_methods=list(retry_methods),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount(
+        'https://',
+        HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    )
+    return session
+
+
+def get_edl_token_cache_path(environment: str) -> Path:
+    """ Location of the local file caching the EDL token for an environment. """
+    return Path.home() / f'.edc-umm-token-{environment}.json'
+
+
+def read_cached_edl_token(environment: str) -> Optional[str]:
+    """ Retrieve a previously cached EDL token, if one exists and will not
+        expire within the next minute. Otherwise return `None`.
+
+    """
+    try:
+        with open(get_edl_token_cache_path(environment), 'rb') as file_handler:
+            cached_token = orjson.loads(file_handler.read())
+
+        expiry = datetime.fromisoformat(cached_token['expiry'])
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+
+    if expiry <= datetime.now(timezone.utc) + timedelta(seconds=60):
+        return None
+
+    return cached_token['access_token']
+
+
+def clear_cached_edl_token(environment: str):
+    """ Remove a cached EDL token, e.g. if it has been revoked. """
+    get_edl_token_cache_path(environment).unlink(missing_ok=True)
+
+
+def save_cached_edl_token(environment: str, edl_token_json: dict):
+    """ Cache an EDL token and its expiry, readable only by the current
+        user. EDL gives `expiration_date` as a date (e.g. '4/15/2025').
+
+        Caching is optional, so any failure (e.g. an unexpected date format,
+        or an unwritable home directory) is printed as a warning rather than
+        raised.
+
+    """
+    try:
+        expiry = datetime.strptime(
+            edl_token_json['expiration_date'], '%m/%d/%Y'
+        ).replace(tzinfo=timezone.utc)
+
+        cache_path = get_edl_token_cache_path(environment)
+        cache_path.touch(mode=0o600)
+        cache_path.chmod(0o600)
+
+        with open(cache_path, 'wb') as file_handler:
+            file_handler.write(orjson.dumps({
+                'access_token': edl_token_json['access_token'],
+                'expiry': expiry.isoformat(),
+            }))
+    except (OSError, KeyError, TypeError, ValueError) as exception:
+        print(f'Warning: could not cache EDL token: {exception!r}')
+
 
 def get_edl_token(environment: str) -> str:
     """ Retrieve an EDL token for use in requests to CMR graph. If
         the user identified by a local .netrc file does not have a
         token then a new one will be generated.
 
+        A token cached by a previous run is used if it is still valid, to
+        avoid requests to EDL entirely.
+
     """
+    cached_edl_token = read_cached_edl_token(environment)
+    if cached_edl_token is not None:
+        return cached_edl_token
+
     edl_root = environment_parameters.get(environment).get('edl_root')
 
-    existing_tokens_response = requests.get(
-        f'{edl_root}/api/users/tokens',
-        headers={'Content-type': 'application/json'}
-    )
+    session = get_pooled_session()
+    session.headers.update({'Content-type': 'application/json'})
+
+    existing_tokens_response = session.get(f'{edl_root}/api/users/tokens')
     existing_tokens_response.raise_for_status()
-    existing_tokens_json = existing_tokens_response.json()
+    existing_tokens_json = orjson.loads(existing_tokens_response.content)
 
     if len(existing_tokens_json) == 0:
-        new_token_response = requests.post(
-            f'{edl_root}/api/users/token',
-            headers={'Content-type': 'application/json'}
-        )
+        new_token_response = session.post(f'{edl_root}/api/users/token')
         new_token_response.raise_for_status()
-        new_token_json = new_token_response.json()
-        edl_token = new_token_json['access_token']
+        edl_token_json = orjson.loads(new_token_response.content)
     else:
-        edl_token = existing_tokens_json[0]['access_token']
+        edl_token_json = existing_tokens_json[0]
+
+    save_cached_edl_token(environment, edl_token_json)
+
+    return edl_token_json['access_token']
+
+
+def fetch_collections_page(
+    session: requests.Session,
+    graphql_rooturl: str,
+    request_json: dict
+) -> requests.Response:
+    """ Request a single page of collections from CMR graph.
+
+        CMR graph paginates using a search-after cursor that is only known
+        once the previous page has been returned, so pages must be requested
+        in order, one at a time. Requests are overlapped with processing of
+        the previous page by running this in `fetch_collections_pages`.
+
+    """
+    return session.post(url=graphql_rooturl, json=request_json)
+
+
+def fetch_collections_pages(
+    session: requests.Session,
+    graphql_rooturl: str,
+    request_queue: Queue,
+    response_queue: Queue
+):
+    """ Worker that requests a page from CMR graph for each request JSON
+        placed on `request_queue`, and places the response (or any raised
+        exception) on `response_queue`. A `None` request stops the worker.
+
+        All exceptions are passed back, as otherwise the worker would stop
+        and leave the main thread waiting indefinitely for a response.
 
-    return edl_token
+    """
+    while (request_json := request_queue.get()) is not None:
+        try:
+            response_queue.put(
+                fetch_collections_page(session, graphql_rooturl, request_json)
+            )
+        except Exception as exception:
+            response_queue.put(exception)
 
 
 def query_cmr_graph_for_collections(
@@ -92,15 +258,48 @@ def query_cmr_graph_for_collections(
     edl_bearer_token: str
 ) -> list[dict]:
     """ Perform a query against CMR graph (https://graphql.earthdata.nasa.gov/api)
-        to retrieve cloud hosted collections with granules that have a granule
-        with a RelatedUrl of type 'USE SERVICE API', subtype 'OPENDAP DATA' and
-        the URL itself points to Hyrax.
-
-        Limit is set to 100 results to avoid timeouts.
+        to retrieve cloud hosted collections and the RelatedUrls of their first
+        granule. These are later filtered to those with a RelatedUrl of type
+        'USE SERVICE API', subtype 'OPENDAP DATA' and the URL itself points to
+        Hyrax.
+
+        That filter cannot be applied by CMR: neither collection nor granule
+        searches accept RelatedUrl type, subtype or URL parameters. The CMR
+        `has_opendap_url` collection facet only reflects collection-level
+        RelatedUrls, and would miss collections where only the granules are
+        OPeNDAP-enabled.
+
+        Limit starts at `CMR_GRAPH_PAGE_LIMIT` results, to reduce the number of
+        round trips. If CMR graph times out (a 504 response), the limit is
+        halved and the same page is requested again. After each successful
+        page the limit is doubled, up to `CMR_GRAPH_PAGE_LIMIT`, so a single
+        slow page does not shrink all subsequent pages. All pages are
+        requested via a single session, so that the connection to CMR graph is
+        reused.
+
+        If CMR graph rejects the EDL token (a 401 or 403 response), e.g.
+        because a cached token has been revoked, the cached token is removed,
+        a new token is retrieved from EDL and the page is requested again,
+        once. If requests still fail after retries, an exception is raised
+        rather than returning a partial list of collections.
+
+        Pages are requested by a background thread. As soon as the cursor for
+        the next page is known, that page is requested, while the current page
+        is still being processed.
 
     """
     graphql_rooturl = environment_parameters.get(environment).get('graphql')
 
+    # GraphQL queries only read data, so POST requests can safely be retried:
+    session = get_pooled_session(
+        retry_statuses=CMR_GRAPH_RETRY_STATUSES,
+        retry_methods=('GET', 'POST')
+    )
+    session.headers.update({
+        'Authorization': f'Bearer {edl_bearer_token}',
+        'Content-Type': 'application/json',
+    })
+
     query_string = """
     query Collections($collectionParams: CollectionsInput, $granulesParams: GranulesInput) {
       collections(params: $collectionParams) {
@@ -123,9 +322,10 @@ def query_cmr_graph_for_collections(
     query_parameters = {
         'collectionParams': {
             'cloudHosted': True,
-            'limit': 100,
+            'limit': CMR_GRAPH_PAGE_LIMIT,
         },
         'granulesParams': {
+            # Only the first granule of each collection is checked:
             'limit': 1
         }
     }
@@ -143,43 +343,108 @@ def query_cmr_graph_for_collections(
     # Create an empty list to contain results after pagination:
     all_collections = []
 
-    # Add an error count and limit, to prevent infinite loops from repeated errors:
+    # Add an error count and limit, to prevent infinite loops from repeated
+    # errors. Transient errors are already retried with backoff by the session,
+    # so this only applies once those retries are exhausted:
     error_count = 0
     max_errors = 3
 
+    # Only replace the EDL token once, to avoid repeatedly requesting tokens:
+    edl_token_refreshed = False
+
+    # Queues for handing requests to, and responses from, the fetch worker.
+    # Only one request is ever in flight, as each needs the previous cursor:
+    request_queue = Queue()
+    response_queue = Queue()
+    fetch_worker = Thread(
+        target=fetch_collections_pages,
+        args=(session, graphql_rooturl, request_queue, response_queue),
+        daemon=True
+    )
+    fetch_worker.start()
+
     # Perform paginated request.
     # Requests will continue until the list is the same length as the number of
     # results in CMR graph.
-    while error_count < max_errors and len(all_collections) < collection_count:
-        cmr_graph_response = requests.post(
-            url=graphql_rooturl,
-            json=request_json,
-            headers={'Authorization': f'Bearer {edl_bearer_token}'}
-        )
-
-        if cmr_graph_response.ok:
-            json_data = cmr_graph_response.json()
-
-            # Update collection_count to actual value:
-            collection_count = json_data['data']['collections']['count']
-
-            # Concatenate new results with existing list:
-            all_collections.extend(
-                json_data['data']['collections']['items']
-            )
-
-            # Update the cursor for the potential next request:
-            request_json['variables']['collectionParams']['cursor'] = (
-                json_data['data']['collections']['cursor']
-            )
-
-            # Print progress:
-            print(f'Retrieved {len(all_collections)}/{collection_count} collections')
-
-        else:
-            error_count += 1
-            print(f'response status code: f{cmr_graph_response.status_code}')
-            print(f'response : {cmr_graph_response.content}')
+    try:
+        request_queue.put(request_json)
+
+        while error_count < max_errors and len(all_collections) < collection_count:
+            cmr_graph_response = response_queue.get()
+
+            if isinstance(cmr_graph_response, Exception):
+                raise cmr_graph_response
+
+            if cmr_graph_response.ok:
+                json_data = orjson.loads(cmr_graph_response.content)
+
+                # Update collection_count to actual value:
+                collection_count = json_data['data']['collections']['count']
+                page_items = json_data['data']['collections']['items']
+
+                # Update the cursor and request the next page straight away, so
+                # it is retrieved while this page is processed. Restore any
+                # limit reduced after a timeout:
+                request_json['variables']['collectionParams']['cursor'] = (
+                    json_data['data']['collections']['cursor']
+                )
+                request_json['variables']['collectionParams']['limit'] = min(
+                    request_json['variables']['collectionParams']['limit'] * 2,
+                    CMR_GRAPH_PAGE_LIMIT
+                )
+
+                if page_items and len(all_collections) + len(page_items) < collection_count:
+                    request_queue.put(request_json)
+
+                # Concatenate new results, minus unused RelatedUrl fields, with
+                # the existing list:
+                all_collections.extend(
+                    get_projected_collection(collection)
+                    for collection in page_items
+                )
+
+                # Print progress:
+                print(f'Retrieved {len(all_collections)}/{collection_count} collections')
+
+                if not page_items:
+                    break
+
+            elif (
+                cmr_graph_response.status_code == 504
+                and request_json['variables']['collectionParams']['limit'] > 1
+            ):
+                # Timed out resolving granules for the page, retry a smaller page:
+                request_json['variables']['collectionParams']['limit'] //= 2
+                print('Timed out, reducing limit to '
+                      f'{request_json["variables"]["collectionParams"]["limit"]}')
+                request_queue.put(request_json)
+
+            elif (
+                cmr_graph_response.status_code in {401, 403}
+                and not edl_token_refreshed
+            ):
+                # The EDL token was rejected, so retrieve a new one:
+                print('EDL token rejected, retrieving a new token')
+                clear_cached_edl_token(environment)
+                edl_bearer_token = get_edl_token(environment)
+                session.headers.update(
+                    {'Authorization': f'Bearer {edl_bearer_token}'}
+                )
+                edl_token_refreshed = True
+                request_queue.put(request_json)
+
+            else:
+                error_count += 1
+                print(f'response status code: f{cmr_graph_response.status_code}')
+                print(f'response : {cmr_graph_response.content}')
+
+                if error_count < max_errors:
+                    request_queue.put(request_json)
+                else:
+                    # Do not return (and save) a partial list of collections:
+                    cmr_graph_response.raise_for_status()
+    finally:
+        request_queue.put(None)
 
     return all_collections
 
@@ -189,57 +454,116 @@ def get_collection_related_urls(collection: dict) -> list[dict]:
         granules or granules with no RelatedUrls. In these two cases, return
         an empty list.
 
+        Malformed collections raise an exception, which is reported by
+        `filter_for_opendap_granules`.
+
     """
-    try:
-        granules = collection.get('granules', {})
-        if granules is None:
-            granules = {}
+    granules = (collection.get('granules') or {}).get('items') or [{}]
+    return granules[0].get('relatedUrls') or []
+
+
+def get_projected_collection(collection: dict) -> dict:
+    """ Reduce a collection returned by CMR graph to only the fields used
+        later: the collection identifiers, and the `RELATED_URL_KEYS` of each
+        RelatedUrl in the first granule.
+
+        This is applied while paging, before the results are saved, so it
+        must not raise for malformed collections. RelatedUrls that are not
+        objects are dropped, and granules that do not have the expected
+        structure are kept unaltered, to be reported when filtering.
+
+    """
+    if not isinstance(collection, dict):
+        return collection
+
+    projected_collection = {
+        key: collection[key]
+        for key in ('shortName', 'version', 'conceptId')
+        if key in collection
+    }
 
-        granules = granules.get('items')
-    except AttributeError:
-        print(f'Failed: {collection["shortName"]}')
-        raise
+    granules = collection.get('granules')
+    granule_items = granules.get('items') if isinstance(granules, dict) else None
 
-    if granules == [] or granules is None:
-        granules = [{}]
+    if (
+        isinstance(granule_items, list)
+        and granule_items
+        and isinstance(granule_items[0], dict)
+        and isinstance(granule_items[0].get('relatedUrls') or [], list)
+    ):
+        granules = {'items': [{
+            'relatedUrls': [
+                {key: related_url[key] for key in RELATED_URL_KEYS if key in related_url}
+                for related_url in granule_items[0].get('relatedUrls') or []
+                if isinstance(related_url, dict)
+            ]
+        }]}
+    elif granules is None or (isinstance(granules, dict) and not granule_items):
+        # No granules, or no granule items:
+        granules = {'items': []}
 
-    return granules[0].get('relatedUrls', [])
+    projected_collection['granules'] = granules
 
+    return projected_collection
 
-def collection_has_opendap_url(collection: dict, environment: str) -> bool:
+
+def collection_has_opendap_url(collection: dict, hyrax_substring: str) -> bool:
     """ Check the following conditions are met for a single RelatedUrl:
 
         - RelatedUrl.type == 'USE SERVICE API'
         - RelatedUrl.subtype == 'OPENDAP DATA'
         - RelatedUrl.url contains Hyrax substring
+
+        The type and subtype are checked together with a single set lookup,
+        so the URL substring scan only runs for OPeNDAP RelatedUrls.
+
     """
-    hyrax_substring = environment_parameters.get(environment).get('hyrax_substring')
-    return any(
-        related_url.get('type') == 'USE SERVICE API'
-        and related_url.get('subtype') == 'OPENDAP DATA'
-        and hyrax_substring in related_url.get('url', '')
-        for related_url in get_collection_related_urls(collection)
-    )
+    for related_url in get_collection_related_urls(collection):
+        # Resolve the bound method once, rather than for each field:
+        get_field = related_url.get
+
+        if (
+            (get_field('type'), get_field('subtype')) in OPENDAP_RELATED_URL_TYPES
+            and hyrax_substring in get_field('url', '')
+        ):
+            return True
+
+    return False
 
 
 def filter_for_opendap_granules(
-    collections: list[dict],
+    collections: Iterable[dict],
     environment: str
-) -> list[dict]:
-    """ Go through the list of all collections and retrieve only those that
-        have an OPeNDAP RelatedUrl.
+) -> Iterator[dict]:
+    """ Go through all collections and yield only those that have an OPeNDAP
+        RelatedUrl. Collections are yielded as they are checked, so the input
+        can be a stream that is never held in memory in full.
+
+        The Hyrax substring is looked up once, rather than per collection.
 
     """
-    return [
-        collection
-        for collection in collections
-        if collection_has_opendap_url(collection, environment)
-    ]
+    hyrax_substring = environment_parameters[environment]['hyrax_substring']
+
+    for collection in collections:
+        try:
+            has_opendap_url = collection_has_opendap_url(collection, hyrax_substring)
+        except (AttributeError, TypeError):
+            if isinstance(collection, dict) and 'shortName' in collection:
+                print(f'Failed: {collection["shortName"]}')
+            else:
+                print(f'Failed: {collection!r}')
+            raise
+
+        if has_opendap_url:
+            yield collection
 
 
 def get_formatted_collection(collection: dict) -> dict:
-    """ Create a streamlined object for saving to a JSON file with only the
-        collection information.
+    """ Create a streamlined object with only the collection information.
+
+        This is the row form of a single collection. It is not used when
+        saving, as `save_opendap_collections` writes the same fields in
+        columnar form directly, without a function call per collection.
 
     """
     return {
@@ -249,12 +573,15 @@ def get_formatted_collection(collection: dict) -> dict:
     }
 
 
-def get_all_collections_from_file(file_path: str) -> list[dict]:
-    """ Retrieve results from CMR (in case there are parsing issues later). """
-    with open(file_path, 'r', encoding='utf-8') as file_handler:
-        all_collections = json.load(file_handler)
+def get_all_collections_from_file(file_path: str) -> Iterator[dict]:
+    """ Retrieve results from CMR (in case there are parsing issues later).
 
-    return all_collections
+        The file is parsed incrementally, yielding one collection at a time,
+        so that the full list of collections is never loaded into memory.
+
+    """
+    with open(file_path, 'rb') as file_handler:
+        yield from ijson.items(file_handler, 'item')
 
 
 def save_all_collections(
@@ -264,29 +591,46 @@ def save_all_collections(
     """ Save intermediate result to avoid querying for 50,000 collections. """
     file_path = f'all_collections_{environment}.json'
 
-    with open(file_path, 'w', encoding='utf-8') as file_handler:
-        json.dump(all_cloud_collections, file_handler, indent=2)
+    with open(file_path, 'wb') as file_handler:
+        file_handler.write(
+            orjson.dumps(all_cloud_collections, option=orjson.OPT_INDENT_2)
+        )
 
     print(f'Saved to {file_path}')
 
 
 def save_opendap_collections(
-    opendap_collections: list[dict],
+    opendap_collections: Iterable[dict],
     environment: str
-) -> None:
+) -> int:
     """ Output all collections identified as having an OPeNDAP RelatedUrl to a
-        JSON output file.
+        JSON output file. The output is columnar, a single object with a list
+        for each of 'short_name', 'version' and 'concept_id', so only three
+        lists of strings are held in memory, rather than a dictionary per
+        collection.
+
+        Returns the number of collections written.
 
     """
     output_filename = f'opendap_collections_{environment}.json'
+    short_names, versions, concept_ids = [], [], []
 
-    formatted_output = [
-        get_formatted_collection(collection)
-        for collection in opendap_collections
-    ]
+    for collection in opendap_collections:
+        short_names.append(collection['shortName'])
+        versions.append(collection['version'])
+        concept_ids.append(collection['conceptId'])
 
-    with open(output_filename, 'w', encoding='utf-8') as file_handler:
-        json.dump(formatted_output, file_handler, indent=2)
+    with open(output_filename, 'wb') as file_handler:
+        file_handler.write(orjson.dumps(
+            {
+                'short_name': short_names,
+                'version': versions,
+                'concept_id': concept_ids,
+            },
+            option=orjson.OPT_INDENT_2
+        ))
+
+    return len(concept_ids)
 
 
 def get_collections_with_opendap_urls(environment: str, file_path: str=None):
@@ -305,17 +649,18 @@ def get_collections_with_opendap_urls(environment: str, file_path: str=None):
             edl_bearer_token
         )
         save_all_collections(all_cloud_collections, environment)
+        print(f'Retrieved {len(all_cloud_collections)} cloud-hosted collections.')
     else:
         all_cloud_collections = get_all_collections_from_file(file_path)
-    print(f'Retrieved {len(all_cloud_collections)} cloud-hosted collections.')
+        print(f'Streaming cloud-hosted collections from {file_path}')
 
     opendap_collections = filter_for_opendap_granules(
         all_cloud_collections,
         environment
     )
-    print(f'{len(opendap_collections)} cloud-hosted collections have OPeNDAP RelatedUrl')
 
-    save_opendap_collections(opendap_collections, environment)
+    opendap_count = save_opendap_collections(opendap_collections, environment)
+    print(f'{opendap_count} cloud-hosted collections have OPeNDAP RelatedUrl')
 
 ### A bit of hackery
 
@@ -331,21 +676,36 @@ def get_short_names_for_pocloud(data: list[dict]) -> list:
     Returns:
       A list of 'short_name' values for concepts with 'concept_id' ending in 'POCLOUD'.
     """
-    pocloud_short_names = []
-    for item in data:
-        if item['concept_id'].endswith('POCLOUD'):
-            pocloud_short_names.append(item['short_name'])
-    return pocloud_short_names
+    return list(iter_short_names_for_pocloud(data))
+
+
+def iter_short_names_for_pocloud(data: Iterable[dict]) -> Iterator[str]:
+    """
+    Generator equivalent of `get_short_names_for_pocloud`, for when the
+    'short_name' values are only consumed once (e.g. by `write_list`).
+
+    Args:
+      data: An iterable of dictionaries with 'short_name' and 'concept_id' keys.
+
+    Yields:
+      'short_name' values for concepts with 'concept_id' ending in 'POCLOUD'.
+    """
+    return (
+        item['short_name']
+        for item in data
+        if item['concept_id'].endswith('POCLOUD')
+    )
 
 
 def read_json_list(filename: str) -> list[dict]:
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+        with open(filename, 'rb') as f:
+            data = orjson.loads(f.read())
     except FileNotFoundError:
         print(f"Error: File {filename} not found.")
 
-    return data
+    # Convert columnar output from `save_opendap_collections` to rows:
+    return get_collection_rows(data)
 
 
 def read_text_file_to_list(filename):
@@ -369,29 +729,26 @@ def read_text_file_to_list(filename):
     return entries
 
 
-def write_list(filename: str, names: list):
+def write_list(filename: str, names: Iterable[str]):
     with open(filename, "w") as file:  # Open the file in write mode ("w")
-        for element in names:
-            file.write(element + "\n")  # Write element with newline character
+        # Write each element with a newline character, without building a list
+        file.writelines(element + "\n" for element in names)
 
 
 def find_elements_in_second_list(list1: list, list2: list):
     """
-    This function finds elements present in the second list but not in the first,
-    and prints them.
+    This function finds unique elements present in the second list but not in
+    the first, and prints them in sorted order.
 
     Args:
      list1: The first list to compare.
      list2: The second list to compare.
     """
-    # Create a set from the first list for efficient membership checking
-    unique_elements = set(list1)
-    # Find elements in list2 that are not in the set (and thus not in list1)
-    elements_not_in_first = [element for element in list2 if element not in unique_elements]
+    # Single C-level set difference, sorted so the output is deterministic
+    elements_not_in_first = sorted(set(list2).difference(list1))
     if elements_not_in_first:
         print("Elements in the second list not present in the first:")
-        for element in elements_not_in_first:
-            print(element)
+        print("\n".join(elements_not_in_first))
     else:
         print("All elements in the second list are present in the first list.")
 
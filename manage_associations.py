@@ -23,6 +23,8 @@
 
     Gotchas:
 
+    - You'll need the `requests` and `orjson` packages in your local Python
+      environment.
     - You'll need to update this script with an active LaunchPad token below.
     - I've adopted LaunchPad tokens throughout, however, even the association
       endpoint is actually part of the CMR search application, so old scripts
@@ -32,15 +34,20 @@
     - You'll need the `opendap_collections_uat.json` and/or
       `opendaop_collections_prod.json` in the same directory as this module to
       successfully run it.
+    - `association_requests.py` and `opendap_collections.py` also need to be in
+      the same directory.
 
     Owen Littlejohns - 2024-03-21
 
 """
-from typing import List, Literal
-import json
+from typing import Dict, List, Literal
 
+import orjson
 import requests
 
+from association_requests import send_association_requests
+from opendap_collections import get_collection_rows
+
 
 Environment = Literal['uat', 'prod']
 
@@ -52,6 +59,10 @@ OPENDAP_CONCEPT_IDS = {'uat': 'S1262134530-EEDTEST',
 
 LAUNCHPAD_TOKEN = '<Insert Launchpad token here>'
 
+# Collection concept IDs grouped by provider, populated on first use for each
+# environment by `get_provider_index`:
+provider_indexes: Dict[str, Dict[str, List[str]]] = {}
+
 
 def get_authenticated_session(launchpad_token: str):
     """ Create a `requests.Session` object with an `Authorization` header
@@ -68,15 +79,38 @@ def read_all_collections(environment: Environment) -> list[dict]:
         granule has OPeNDAP metadata.
 
         This file assumes that `opendap_collection_<environment>.json` is a
-        sibling file to this script.
+        sibling file to this script. The file can either be a list of
+        collection objects, or the columnar format now written by
+        `get_collections_with_opendap.py`, which is converted to the former.
 
     """
     json_file_name = f'opendap_collections_{environment}.json'
 
-    with open(json_file_name, encoding='utf-8') as file_handler:
-        all_collections = json.load(file_handler)
+    with open(json_file_name, 'rb') as file_handler:
+        all_collections = orjson.loads(file_handler.read())
+
+    return get_collection_rows(all_collections)
+
+
+def get_provider_index(environment: Environment) -> Dict[str, List[str]]:
+    """ Retrieve all UMM-C concept IDs in an environment, grouped by their
+        provider (the suffix after the last '-', in upper case).
+
+        The index is built from the JSON file once per environment, and reused
+        by subsequent calls.
+
+    """
+    if environment not in provider_indexes:
+        provider_index = {}
+
+        for collection in read_all_collections(environment):
+            concept_id = collection.get('concept_id', '')
+            provider = concept_id.rsplit('-', 1)[-1].upper()
+            provider_index.setdefault(provider, []).append(concept_id)
 
-    return all_collections
+        provider_indexes[environment] = provider_index
+
+    return provider_indexes[environment]
 
 
 def get_provider_collections(
@@ -84,18 +118,12 @@ def get_provider_collections(
     environment: Environment
 ) -> List[str]:
     """ Retrieve a list of UMM-C concept IDs showing all collections from a
-        single provider.
+        single provider. The provider is matched case-insensitively.
 
     """
-    collection_provider_lower = collection_provider.lower()
-    all_collections = read_all_collections(environment)
-
-    return [
-        collection['concept_id']
-        for collection
-        in all_collections
-        if collection.get('concept_id', '').lower().endswith(collection_provider_lower)
-    ]
+    return list(
+        get_provider_index(environment).get(collection_provider.upper(), [])
+    )
 
 
 def create_associations(
@@ -104,18 +132,18 @@ def create_associations(
     umm_s_concept_id: str,
     collection_concept_ids: List[str]
 ):
-    """ Make a single request to CMR to create associations between the
-        specified UMM-S record and all listed UMM-C records.
+    """ Make requests to CMR to create associations between the specified
+        UMM-S record and all listed UMM-C records. Collections are sent in
+        chunks (see `association_requests.py`), so a failure only affects one
+        chunk.
 
     """
-    json_payload = [{'concept_id': collection_concept_id}
-                    for collection_concept_id in collection_concept_ids]
-
-    create_response = authenticated_session.post(
+    send_association_requests(
+        authenticated_session,
+        'POST',
         f'{base_cmr_url}/search/services/{umm_s_concept_id}/associations',
-        json=json_payload
+        collection_concept_ids
     )
-    create_response.raise_for_status()
 
 
 def make_opendap_associations(
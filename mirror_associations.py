@@ -29,13 +29,16 @@
 
     - You'll need to update this script with an active LaunchPad token below.
     - I _think_ creating and deleting multiple associations in a single request
-      should work. But I've not tested it. The alternative would be to loop
-      through and make request per collection.
+      should work. But I've not tested it. Requests are split into chunks of
+      `association_requests.CHUNK_SIZE` collections, so reducing that value
+      moves towards making a request per collection.
     - I've adopted LaunchPad tokens throughout, however, even the association
       endpoint is actually part of the CMR search application, so old scripts
       that had previously been used had adopted EDL bearer tokens instead. I
       think this should work fine, though, and seems the "correct" type of
       authentication to use.
+    - `association_requests.py` needs to be in the same directory as this
+      module.
 
     Owen Littlejohns - 2024-03-21
 
@@ -44,6 +47,8 @@ from typing import List, Literal
 
 import requests
 
+from association_requests import send_association_requests
+
 
 Environment = Literal['uat', 'prod']
 
@@ -104,18 +109,18 @@ def create_associations(
     umm_s_concept_id: str,
     collection_concept_ids: List[str]
 ):
-    """ Make a single request to CMR to create associations between the
-        specified UMM-S record and all listed UMM-C records.
+    """ Make requests to CMR to create associations between the specified
+        UMM-S record and all listed UMM-C records. Collections are sent in
+        chunks (see `association_requests.py`), so a failure only affects one
+        chunk.
 
     """
-    json_payload = [{'concept_id': collection_concept_id}
-                    for collection_concept_id in collection_concept_ids]
-
-    create_response = authenticated_session.post(
+    send_association_requests(
+        authenticated_session,
+        'POST',
         f'{base_cmr_url}/search/services/{umm_s_concept_id}/associations',
-        json=json_payload
+        collection_concept_ids
     )
-    create_response.raise_for_status()
 
 
 def remove_associations(
@@ -124,21 +129,19 @@ def remove_associations(
     umm_s_concept_id: str,
     collection_concept_ids: List[str]
 ):
-    """ Make a single request to CMR to remove associations between the
-        specified UMM-S record and all listed UMM-C records.
+    """ Make requests to CMR to remove associations between the specified
+        UMM-S record and all listed UMM-C records.
 
         This is almost identical to `create_associations`, just using a
         different HTTP request method.
 
     """
-    json_payload = [{'concept_id': collection_concept_id}
-                    for collection_concept_id in collection_concept_ids]
-
-    delete_response = authenticated_session.delete(
+    send_association_requests(
+        authenticated_session,
+        'DELETE',
         f'{base_cmr_url}/search/services/{umm_s_concept_id}/associations',
-        json=json_payload
+        collection_concept_ids
     )
-    delete_response.raise_for_status()
 
 
 def mirror_service_associations(service_with_associations: str,
@@ -0,0 +1,37 @@
+""" Shared functionality for reading the `opendap_collections_<environment>.json`
+    files written by `get_collections_with_opendap.py`, used by both that
+    module and `manage_associations.py`.
+
+    These files are written in a columnar format, a single object with a list
+    for each of 'short_name', 'version' and 'concept_id'. Older files are a
+    list of objects, one per collection, each with those three keys.
+
+"""
+from typing import List, Union
+
+
+def get_collection_rows(
+    opendap_collections: Union[dict, List[dict]]
+) -> List[dict]:
+    """ Convert the columnar format of OPeNDAP collections to a list of
+        objects, one per collection. A list of objects is returned unaltered.
+
+        All columns must be the same length, so that no collections are
+        silently dropped.
+
+    """
+    if not isinstance(opendap_collections, dict):
+        return opendap_collections
+
+    column_lengths = {
+        column_name: len(column)
+        for column_name, column in opendap_collections.items()
+    }
+
+    if len(set(column_lengths.values())) > 1:
+        raise ValueError(f'OPeNDAP collection columns differ in length: {column_lengths}')
+
+    return [
+        dict(zip(opendap_collections, row))
+        for row in zip(*opendap_collections.values())
+    ]